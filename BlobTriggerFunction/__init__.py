@@ -1,54 +1,113 @@
 import logging
+import os
+import threading
 import azure.functions as func
 import pyodbc
 
+# Driver-manager pooling; must be set before the first connect
+pyodbc.pooling = True
+
+# ODBC pre-connect attribute (SQL_ATTR_PACKET_SIZE). A batched executemany is
+# one large TDS message; the 4 KB default splits it into many packets, so ask
+# for SQL Server's maximum instead
+SQL_ATTR_PACKET_SIZE = 112
+TDS_PACKET_SIZE = 32767
+
+# SQLSTATEs raised when the server connection has dropped or is unreachable
+RECONNECT_STATES = ("08S01", "08001")
+
+# Connection kept across invocations of a warm worker; the lock keeps
+# concurrent invocations off the same pyodbc connection
+_conn = None
+_conn_lock = threading.Lock()
+
+def _get_conn():
+    global _conn
+    if _conn is None or _conn.closed:
+        _conn = pyodbc.connect(
+            os.environ["SQLConnectionString"],
+            autocommit=False,
+            attrs_before={SQL_ATTR_PACKET_SIZE: TDS_PACKET_SIZE},
+        )
+        logging.info("Connected to SQL successfully")
+    return _conn
+
+def _reset_conn():
+    global _conn
+    if _conn is not None:
+        try:
+            _conn.close()
+        except pyodbc.Error:
+            pass
+    _conn = None
+
 def parse_edi(edi_text):
-    # Placeholder: parse EDI segments and return structured claims
-    logging.info("Starting EDI parsing")
+    # Placeholder: parse EDI segments and return (claim_id, amount) rows,
+    # already in BlobAudit parameter order so they can be bound as-is
+    logging.debug("Starting EDI parsing")
     claims = []
     for line in edi_text.split("~"):
         if line.startswith("CLP"):
-            parts = line.split("|")
+            # Only the first four elements are used; don't tokenize the rest
+            parts = line.split("|", 4)
             claim_id = parts[1]
             amount = float(parts[3])
-            claims.append({"claim_id": claim_id, "amount": amount})
-    logging.info(f"Parsed {len(claims)} claims")
+            claims.append((claim_id, amount))
+    logging.info("Parsed %d claims", len(claims))
     return claims
 
-def insert_claims_to_sql(claims):
-    try:
-        conn_str = (
-            "Driver={ODBC Driver 17 for SQL Server};"
-            "Server=tcp:sql-jfprofsol-dev.database.windows.net,1433;"
-            "Database=JFProfSol-dev-db;"
-            "Uid=jfprofsol_adm;"
-            "Pwd=kBL&SUZ.>M(m@-<@c;"
-            "Encrypt=yes;"
-            "TrustServerCertificate=no;"
-            "Connection Timeout=30;"
-        )
-        conn = pyodbc.connect(conn_str)
-        cursor = conn.cursor()
-        logging.info("Connected to SQL successfully")
+def _write_claims(conn, claims):
+    cursor = conn.cursor()
+    # One batched round-trip instead of one execute per claim
+    cursor.fast_executemany = True
+    cursor.executemany(
+        "INSERT INTO dbo.BlobAudit (ClaimID, Amount) VALUES (?, ?)",
+        claims
+    )
 
-        for claim in claims:
-            cursor.execute(
-                "INSERT INTO dbo.BlobAudit (ClaimID, Amount) VALUES (?, ?)",
-                claim["claim_id"], claim["amount"]
-            )
-        conn.commit()
-        logging.info(f"Inserted {len(claims)} rows into BlobAudit")
+def insert_claims_to_sql(claims):
+    if not claims:
+        # Nothing to write; don't open a connection or send an empty commit
         return True
+    with _conn_lock:
+        try:
+            try:
+                conn = _get_conn()
+                _write_claims(conn, claims)
+            except pyodbc.Error as e:
+                if not e.args or e.args[0] not in RECONNECT_STATES:
+                    raise
+                logging.warning("SQL connection lost (%s), reconnecting", e.args[0])
+                _reset_conn()
+                conn = _get_conn()
+                _write_claims(conn, claims)
 
-    except Exception as e:
-        logging.error(f"SQL insert failed: {str(e)}", exc_info=True)
-        return False
+        except Exception as e:
+            logging.error("SQL insert failed: %s", e, exc_info=True)
+            if _conn is not None:
+                try:
+                    _conn.rollback()
+                except pyodbc.Error:
+                    _reset_conn()
+            return False
+
+        try:
+            conn.commit()
+        except pyodbc.Error as e:
+            # The server may have committed before the link failed, so the
+            # batch is never replayed here
+            logging.error("SQL commit failed: %s", e, exc_info=True)
+            _reset_conn()
+            return False
+
+        logging.info("Inserted %d rows into BlobAudit", len(claims))
+        return True
 
 def main(inputBlob: func.InputStream):
-    logging.warning("=== Blob Trigger Activated ===")
+    logging.info("=== Blob Trigger Activated ===")
     try:
         edi_content = inputBlob.read().decode('utf-8')
-        logging.info(f"EDI file size: {len(edi_content)} bytes")
+        logging.info("EDI file size: %d bytes", len(edi_content))
 
         claims = parse_edi(edi_content)
         success = insert_claims_to_sql(claims)
@@ -59,4 +118,4 @@ def main(inputBlob: func.InputStream):
             logging.warning("Function completed with SQL insert failure")
 
     except Exception as e:
-        logging.error(f"Unhandled exception: {str(e)}", exc_info=True)
+        logging.error("Unhandled exception: %s", e, exc_info=True)